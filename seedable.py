@@ -3,14 +3,20 @@
 import os
 import re
 import logging
-import hashlib
 import time
-from typing import List, Dict, Any, Tuple
-from collections import defaultdict
+import threading
+from typing import List, Dict, Any, Tuple, Optional, Iterator, Mapping
+from collections import OrderedDict
 from datetime import datetime
+from functools import lru_cache, wraps
 from flask import Flask, request, Response
 import requests
+import redis
+import orjson
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from xml.etree.ElementTree import Element, SubElement, tostring
+from xml.sax.saxutils import escape
 
 logging.basicConfig(
     level=logging.INFO,
@@ -31,61 +37,227 @@ RADARR_API_KEY = os.getenv('RADARR_API_KEY', '')
 SONARR_URL = os.getenv('SONARR_URL', 'http://YOUR_SERVER_IP:8989')
 SONARR_API_KEY = os.getenv('SONARR_API_KEY', '')
 
+REDIS_URL = os.getenv('REDIS_URL', '')
+
 PRIVATE_TRACKERS_STR = os.getenv('PRIVATE_TRACKERS', '')
-PRIVATE_TRACKERS = set(t.strip() for t in PRIVATE_TRACKERS_STR.split(',') if t.strip())
+PRIVATE_TRACKERS = frozenset(t.strip().lower() for t in PRIVATE_TRACKERS_STR.split(',') if t.strip())
+
+_TITLE_SEP_TRANS = str.maketrans({'.': ' ', '_': ' ', '-': ' '})
+_RE_WWW = re.compile(r'\bwww\s+\w+\s+(?:org|com|net)\b')
+
+_RFC822_FORMAT = '%a, %d %b %Y %H:%M:%S +0000'
+_HYDRA_DATE_FORMAT = '%d-%m-%Y %H:%M'
+_WEEKDAYS = ('Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun')
+_MONTHS = ('Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec')
+_rfc822_now_cache = (0, '')
+
+_XML_ATTR_ENTITIES = {'"': '&quot;', '\n': '&#10;', '\r': '&#13;', '\t': '&#09;'}
+
+_CATEGORY_MAP = {
+    'movies': '2000',
+    'movies foreign': '2010',
+    'movies other': '2020',
+    'movies sd': '2030',
+    'movies hd': '2040',
+    'movies uhd': '2045',
+    'movies 4k': '2045',
+    'movies bluray': '2050',
+    'movies 3d': '2060',
+    'tv': '5000',
+    'tv foreign': '5020',
+    'tv sd': '5030',
+    'tv hd': '5040',
+    'tv uhd': '5045',
+    'tv 4k': '5045',
+    'tv other': '5050',
+    'tv sport': '5060',
+    'tv anime': '5070',
+    'anime': '5070',
+    'tv documentary': '5080',
+    'audio': '3000',
+    'audio mp3': '3010',
+    'audio video': '3020',
+    'audio audiobook': '3030',
+    'audio lossless': '3040',
+    'console': '1000',
+    'pc': '4000',
+    'xxx': '6000',
+    'books': '7000',
+    'other': '8000',
+}
+
+_KNOWN_CATEGORY_IDS = frozenset(_CATEGORY_MAP.values())
+
+_CHANNEL_OPEN = ('<?xml version="1.0" encoding="UTF-8"?>\n'
+                 '<rss version="2.0" xmlns:torznab="http://torznab.com/schemas/2015/feed" '
+                 'xmlns:atom="http://www.w3.org/2005/Atom">'
+                 '<channel>'
+                 '<title>Seedable - Cross-Seed Filter</title>'
+                 '<description>Filtered torrents available on 2+ trackers</description>')
+_CHANNEL_CLOSE = '</channel></rss>'
+
+_HYDRA_CATEGORY_MAP = {
+    '2000': 'Movies',
+    '2010': 'Movies SD',
+    '2040': 'Movies HD',
+    '2045': 'Movies UHD',
+    '5000': 'TV',
+    '5030': 'TV SD',
+    '5040': 'TV HD',
+    '5045': 'TV UHD',
+}
+
+_HYDRA_PARAM_MAP = (('season', 'season'), ('ep', 'episode'), ('tvdbid', 'tvdbid'))
 
 app = Flask(__name__)
 
-results_cache = {}
+_http_session = None
+_http_session_lock = threading.Lock()
+
+redis_client = redis.Redis.from_url(REDIS_URL, decode_responses=False, socket_connect_timeout=1, socket_timeout=1) if REDIS_URL else None
+
+results_cache = OrderedDict()
+results_cache_lock = threading.Lock()
 CACHE_TTL = 60
+CACHE_MAX = 1024
+_CACHE_KEY_FIELDS = ('q', 'cat', 'imdbid', 'tvdbid', 'season', 'ep', 't')
 
+TITLE_CACHE_TTL = 86400
+TITLE_CACHE_NEGATIVE_TTL = 300
+TITLE_CACHE_MAX = 4096
+
+
+def get_cache_key(params: Mapping[str, str]) -> Tuple[str, ...]:
+    return tuple(params.get(field, '') for field in _CACHE_KEY_FIELDS)
+
+
+def _redis_key(cache_key: Tuple[str, ...]) -> str:
+    return 'seedable:' + '\0'.join(cache_key)
 
-def get_cache_key(params: Dict[str, str]) -> str:
-    cache_params = {
-        'q': params.get('q', ''),
-        'cat': params.get('cat', ''),
-        'imdbid': params.get('imdbid', ''),
-        'tvdbid': params.get('tvdbid', ''),
-        'season': params.get('season', ''),
-        'ep': params.get('ep', ''),
-        't': params.get('t', ''),
-    }
-    key_str = str(sorted(cache_params.items()))
-    return hashlib.md5(key_str.encode()).hexdigest()
+
+def get_http_session() -> requests.Session:
+    global _http_session
+    if _http_session is None:
+        with _http_session_lock:
+            if _http_session is None:
+                session = requests.Session()
+                session.headers.update({'Connection': 'keep-alive'})
+                adapter = HTTPAdapter(
+                    pool_connections=4,
+                    pool_maxsize=32,
+                    max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[502, 503, 504])
+                )
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                _http_session = session
+    return _http_session
 
 
 def clean_expired_cache():
     current_time = time.time()
-    expired_keys = [k for k, v in results_cache.items()
-                    if current_time - v['timestamp'] > CACHE_TTL]
-    for key in expired_keys:
-        del results_cache[key]
-        logger.debug(f"Removed expired cache entry: {key}")
+    with results_cache_lock:
+        while results_cache:
+            key, entry = next(iter(results_cache.items()))
+            if current_time - entry['timestamp'] < CACHE_TTL:
+                break
+            results_cache.popitem(last=False)
+            logger.debug("Removed expired cache entry: %s", key)
+
+
+def get_cached_results(cache_key: Tuple[str, ...]) -> Optional[List[Tuple[Dict[str, Any], Optional[Tuple[int, int]]]]]:
+    if redis_client is not None:
+        try:
+            blob = redis_client.get(_redis_key(cache_key))
+        except redis.exceptions.RedisError as e:
+            logger.error("Error reading from Redis cache: %s", e)
+            return None
+
+        if blob is None:
+            return None
+
+        try:
+            cached_results = [(result, tracker_counts) for result, tracker_counts in orjson.loads(blob)]
+        except (ValueError, TypeError) as e:
+            logger.error("Discarding unreadable Redis cache entry: %s", e)
+            return None
+
+        logger.info("Using cached results from Redis (%d results)", len(cached_results))
+        return cached_results
+
+    clean_expired_cache()
+
+    with results_cache_lock:
+        cache_entry = results_cache.get(cache_key)
+    if cache_entry is None:
+        return None
+
+    cache_age = time.time() - cache_entry['timestamp']
+    logger.info("Using cached results (age: %.1fs, %d results)", cache_age, len(cache_entry['results']))
+    return cache_entry['results']
+
+
+def set_cached_results(cache_key: Tuple[str, ...], results: List[Tuple[Dict[str, Any], Optional[Tuple[int, int]]]]):
+    if redis_client is not None:
+        try:
+            redis_client.setex(_redis_key(cache_key), CACHE_TTL, orjson.dumps(results))
+        except redis.exceptions.RedisError as e:
+            logger.error("Error writing to Redis cache: %s", e)
+        return
+
+    with results_cache_lock:
+        results_cache[cache_key] = {
+            'results': results,
+            'timestamp': time.time()
+        }
+        results_cache.move_to_end(cache_key)
+        while len(results_cache) > CACHE_MAX:
+            results_cache.popitem(last=False)
+
+
+@lru_cache(maxsize=4096)
+def normalize_title(title: str) -> str:
+    normalized = title.lower().translate(_TITLE_SEP_TRANS)
+    if 'www' in normalized:
+        normalized = _RE_WWW.sub('', normalized)
+    return ' '.join(normalized.split())
 
 
-def normalize_title(title: str) -> str:
-    normalized = title.lower()
-    normalized = re.sub(r'[._-]+', ' ', normalized)
-    normalized = re.sub(r'\bwww\s+\w+\s+(org|com|net)\b', '', normalized)
-    normalized = re.sub(r'\s+', ' ', normalized)
-    return normalized.strip()
+def rfc822_now() -> str:
+    global _rfc822_now_cache
+    now = int(time.time())
+    cached_ts, cached_str = _rfc822_now_cache
+    if cached_ts != now:
+        cached_str = datetime.utcfromtimestamp(now).strftime(_RFC822_FORMAT)
+        _rfc822_now_cache = (now, cached_str)
+    return cached_str
 
 
-def format_rfc822_date(date_str: str) -> str:
+def format_rfc822_date(date_str: str, default_str: Optional[str] = None) -> str:
     if not date_str:
-        return datetime.utcnow().strftime('%a, %d %b %Y %H:%M:%S +0000')
+        return default_str or rfc822_now()
 
     try:
-        if 'T' in date_str:
-            dt = datetime.fromisoformat(date_str.replace('Z', '+00:00'))
+        if (len(date_str) >= 19 and date_str[4] == '-' and date_str[7] == '-' and date_str[10] == 'T'
+                and date_str[13] == ':' and date_str[16] == ':' and date_str[19:] in ('', 'Z', '+00:00')):
+            year, month, day = int(date_str[0:4]), int(date_str[5:7]), int(date_str[8:10])
+            hour, minute, second = int(date_str[11:13]), int(date_str[14:16]), int(date_str[17:19])
+        elif (len(date_str) == 16 and date_str[2] == '-' and date_str[5] == '-' and date_str[10] == ' '
+                and date_str[13] == ':'):
+            day, month, year = int(date_str[0:2]), int(date_str[3:5]), int(date_str[6:10])
+            hour, minute, second = int(date_str[11:13]), int(date_str[14:16]), 0
+        elif 'T' in date_str:
+            return datetime.fromisoformat(date_str.replace('Z', '+00:00')).strftime(_RFC822_FORMAT)
         elif '-' in date_str and ' ' in date_str:
-            dt = datetime.strptime(date_str, '%d-%m-%Y %H:%M')
+            return datetime.strptime(date_str, _HYDRA_DATE_FORMAT).strftime(_RFC822_FORMAT)
         else:
-            dt = datetime.utcnow()
+            return default_str or rfc822_now()
+
+        weekday = datetime(year, month, day, hour, minute, second).weekday()
     except (ValueError, AttributeError):
-        dt = datetime.utcnow()
+        return default_str or rfc822_now()
 
-    return dt.strftime('%a, %d %b %Y %H:%M:%S +0000')
+    return (f'{_WEEKDAYS[weekday]}, {day:02d} {_MONTHS[month - 1]} {year} '
+            f'{hour:02d}:{minute:02d}:{second:02d} +0000')
 
 
 def get_size_bucket(size_bytes: int, tolerance_percent: float = SIZE_TOLERANCE_PERCENT) -> int:
@@ -101,88 +273,126 @@ def get_size_bucket(size_bytes: int, tolerance_percent: float = SIZE_TOLERANCE_P
     return round(size_mb / bucket_size) * bucket_size
 
 
-def group_results(results: List[Dict[str, Any]]) -> Dict[Tuple, List[Dict[str, Any]]]:
-    groups = defaultdict(list)
+def group_and_filter(results: List[Dict[str, Any]]) -> List[Tuple[Dict[str, Any], Optional[Tuple[int, int]]]]:
+    groups = {}
+    seen_urls = set()
+    duplicates = 0
+    count_trackers = bool(PRIVATE_TRACKERS)
 
-    for result in results:
-        title = result.get('title', '')
-        size = result.get('size', 0)
-
-        norm_title = normalize_title(title)
-        size_bucket = get_size_bucket(size)
+    _groups_get = groups.get
+    _seen_add = seen_urls.add
+    _nt = normalize_title
+    _sb = get_size_bucket
 
-        key = (norm_title, size_bucket)
-        groups[key].append(result)
+    for result in results:
+        link = result.get('link', '')
+        if link:
+            if link in seen_urls:
+                duplicates += 1
+                continue
+            _seen_add(link)
+
+        key = (_nt(result.get('title', '')), _sb(result.get('size', 0)))
+        group = _groups_get(key)
+        if group is None:
+            group = groups[key] = {'items': [], 'priv': 0, 'pub': 0}
+        group['items'].append(result)
+        if count_trackers:
+            indexer = (result.get('indexer') or '').lower()
+            if indexer in PRIVATE_TRACKERS:
+                group['priv'] += 1
+            else:
+                group['pub'] += 1
 
-    return groups
+    if duplicates:
+        logger.info("Deduplicated %d → %d results (removed %d duplicate URLs)", len(results), len(results) - duplicates, duplicates)
 
+    logger.info("Grouped into %d unique releases", len(groups))
 
-def filter_cross_seedable(groups: Dict[Tuple, List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
     cross_seedable = []
 
-    for group_key, group_results in groups.items():
+    for group_key, group in groups.items():
+        group_results = group['items']
+
         if len(group_results) < MIN_DUPLICATES:
-            logger.debug(f"Group '{group_key[0][:50]}...' has {len(group_results)} matches - FILTERED (below min)")
+            logger.debug("Group '%s...' has %d matches - FILTERED (below min)", group_key[0][:50], len(group_results))
             continue
 
-        private_count = 0
-        public_count = 0
+        if not count_trackers:
+            cross_seedable.extend((result, None) for result in group_results if result.get('link'))
+            logger.debug("Group '%s...' has %d matches - KEPT", group_key[0][:50], len(group_results))
+            continue
 
-        for result in group_results:
-            indexer = result.get('indexer', '')
-            if indexer in PRIVATE_TRACKERS:
-                private_count += 1
-            else:
-                public_count += 1
+        private_count = group['priv']
+        public_count = group['pub']
 
-        if PRIVATE_TRACKERS and private_count == 0:
-            logger.debug(f"Group '{group_key[0][:50]}...' has only public trackers ({public_count} public) - FILTERED")
+        if private_count == 0:
+            logger.debug("Group '%s...' has only public trackers (%d public) - FILTERED", group_key[0][:50], public_count)
             continue
 
-        for result in group_results:
-            result['_tracker_counts'] = {
-                'private': private_count,
-                'public': public_count
-            }
-            cross_seedable.append(result)
+        tracker_counts = (private_count, public_count)
+        cross_seedable.extend((result, tracker_counts) for result in group_results if result.get('link'))
 
-        if PRIVATE_TRACKERS:
-            logger.debug(f"Group '{group_key[0][:50]}...' - KEPT ({private_count} private, {public_count} public)")
-        else:
-            logger.debug(f"Group '{group_key[0][:50]}...' has {len(group_results)} matches - KEPT")
+        logger.debug("Group '%s...' - KEPT (%d private, %d public)", group_key[0][:50], private_count, public_count)
 
     return cross_seedable
 
 
+def ttl_cache(maxsize: int, ttl: int, negative_ttl: int):
+    def decorator(func):
+        cache = OrderedDict()
+        lock = threading.Lock()
+
+        @wraps(func)
+        def wrapper(key: str) -> str:
+            key = key.strip()
+            now = time.time()
+            with lock:
+                entry = cache.get(key)
+                if entry is not None and entry[1] > now:
+                    return entry[0]
+
+            value = func(key)
+
+            with lock:
+                cache[key] = (value, now + (ttl if value else negative_ttl))
+                cache.move_to_end(key)
+                while len(cache) > maxsize:
+                    cache.popitem(last=False)
+            return value
+
+        return wrapper
+    return decorator
+
+
+@ttl_cache(maxsize=TITLE_CACHE_MAX, ttl=TITLE_CACHE_TTL, negative_ttl=TITLE_CACHE_NEGATIVE_TTL)
 def lookup_title_from_radarr(imdb_id: str) -> str:
     if not RADARR_URL or not RADARR_API_KEY:
         return ''
 
     try:
-        if not imdb_id.startswith('tt'):
-            imdb_id = f'tt{imdb_id}'
-
         url = f"{RADARR_URL}/api/v3/movie/lookup/imdb"
         params = {'imdbId': imdb_id}
         headers = {'X-Api-Key': RADARR_API_KEY}
 
-        response = requests.get(url, params=params, headers=headers, timeout=10)
+        response = get_http_session().get(url, params=params, headers=headers, timeout=10)
         response.raise_for_status()
-        data = response.json()
+        data = orjson.loads(response.content)
 
         if data and data.get('title'):
             title = data['title']
-            logger.info(f"Looked up IMDb {imdb_id} via Radarr → title: '{title}'")
+            logger.info("Looked up IMDb %s via Radarr → title: '%s'", imdb_id, title)
             return title
 
-        logger.warning(f"No title found for IMDb ID {imdb_id} in Radarr")
+        logger.warning("No title found for IMDb ID %s in Radarr", imdb_id)
         return ''
 
-    except requests.exceptions.RequestException as e:
-        logger.error(f"Error looking up IMDb ID {imdb_id} from Radarr: {e}")
+    except (requests.exceptions.RequestException, orjson.JSONDecodeError) as e:
+        logger.error("Error looking up IMDb ID %s from Radarr: %s", imdb_id, e)
         return ''
 
 
+@ttl_cache(maxsize=TITLE_CACHE_MAX, ttl=TITLE_CACHE_TTL, negative_ttl=TITLE_CACHE_NEGATIVE_TTL)
 def lookup_title_from_sonarr(tvdb_id: str) -> str:
     if not SONARR_URL or not SONARR_API_KEY:
         return ''
@@ -192,211 +402,161 @@ def lookup_title_from_sonarr(tvdb_id: str) -> str:
         params = {'term': f'tvdb:{tvdb_id}'}
         headers = {'X-Api-Key': SONARR_API_KEY}
 
-        response = requests.get(url, params=params, headers=headers, timeout=10)
+        response = get_http_session().get(url, params=params, headers=headers, timeout=10)
         response.raise_for_status()
-        data = response.json()
+        data = orjson.loads(response.content)
 
         if data and len(data) > 0 and data[0].get('title'):
             title = data[0]['title']
-            logger.info(f"Looked up TVDb {tvdb_id} via Sonarr → title: '{title}'")
+            logger.info("Looked up TVDb %s via Sonarr → title: '%s'", tvdb_id, title)
             return title
 
-        logger.warning(f"No title found for TVDb ID {tvdb_id} in Sonarr")
+        logger.warning("No title found for TVDb ID %s in Sonarr", tvdb_id)
         return ''
 
-    except requests.exceptions.RequestException as e:
-        logger.error(f"Error looking up TVDb ID {tvdb_id} from Sonarr: {e}")
+    except (requests.exceptions.RequestException, orjson.JSONDecodeError) as e:
+        logger.error("Error looking up TVDb ID %s from Sonarr: %s", tvdb_id, e)
         return ''
 
 
-def query_nzbhydra(params: Dict[str, str]) -> Dict[str, Any]:
-    category_map = {
-        '2000': 'Movies',
-        '2010': 'Movies SD',
-        '2040': 'Movies HD',
-        '2045': 'Movies UHD',
-        '5000': 'TV',
-        '5030': 'TV SD',
-        '5040': 'TV HD',
-        '5045': 'TV UHD',
-    }
-
+def query_nzbhydra(params: Mapping[str, str]) -> Dict[str, Any]:
     query = params.get('q', '')
 
+    imdb = params.get('imdbid')
+    if imdb and not imdb.startswith('tt'):
+        imdb = f'tt{imdb}'
+
     if not query:
-        if params.get('imdbid'):
-            looked_up_title = lookup_title_from_radarr(params.get('imdbid'))
+        if imdb:
+            looked_up_title = lookup_title_from_radarr(imdb)
             if looked_up_title:
                 query = looked_up_title
-                logger.info(f"Using Radarr lookup: '{query}' instead of just IMDb ID")
+                logger.info("Using Radarr lookup: '%s' instead of just IMDb ID", query)
         elif params.get('tvdbid'):
             looked_up_title = lookup_title_from_sonarr(params.get('tvdbid'))
             if looked_up_title:
                 query = looked_up_title
-                logger.info(f"Using Sonarr lookup: '{query}' instead of just TVDb ID")
+                logger.info("Using Sonarr lookup: '%s' instead of just TVDb ID", query)
 
     hydra_params = {
         'query': query,
-        'category': category_map.get(params.get('cat', ''), 'All'),
+        'category': _HYDRA_CATEGORY_MAP.get(params.get('cat', ''), 'All'),
     }
+    hydra_params.update((hydra_key, params[torznab_key])
+                        for torznab_key, hydra_key in _HYDRA_PARAM_MAP if params.get(torznab_key))
 
-    if params.get('season'):
-        hydra_params['season'] = params.get('season')
-    if params.get('ep'):
-        hydra_params['episode'] = params.get('ep')
-
-    if params.get('imdbid'):
-        imdb = params.get('imdbid')
-        if not imdb.startswith('tt'):
-            imdb = f'tt{imdb}'
+    if imdb:
         hydra_params['imdbid'] = imdb
-    if params.get('tvdbid'):
-        hydra_params['tvdbid'] = params.get('tvdbid')
 
-    logger.info(f"Querying NZBHydra2: {hydra_params}")
+    logger.info("Querying NZBHydra2: %s", hydra_params)
 
     try:
         url = f"{NZBHYDRA_URL}/internalapi/search"
 
-        params = {}
+        query_params = {}
         if NZBHYDRA_API_KEY:
-            params['apikey'] = NZBHYDRA_API_KEY
+            query_params['apikey'] = NZBHYDRA_API_KEY
 
-        response = requests.post(url, json=hydra_params, params=params, timeout=60)
+        response = get_http_session().post(url, data=orjson.dumps(hydra_params), params=query_params,
+                                           headers={'Content-Type': 'application/json'}, timeout=60)
         response.raise_for_status()
-        return response.json()
-    except requests.exceptions.RequestException as e:
-        logger.error(f"Error querying NZBHydra2: {e}")
+        return orjson.loads(response.content)
+    except (requests.exceptions.RequestException, orjson.JSONDecodeError) as e:
+        logger.error("Error querying NZBHydra2: %s", e)
         return {'searchResults': [], 'numberOfAvailableResults': 0}
 
 
+@lru_cache(maxsize=256)
 def map_category_to_torznab(category: str) -> str:
-    category_mapping = {
-        'movies': '2000',
-        'movies foreign': '2010',
-        'movies other': '2020',
-        'movies sd': '2030',
-        'movies hd': '2040',
-        'movies uhd': '2045',
-        'movies 4k': '2045',
-        'movies bluray': '2050',
-        'movies 3d': '2060',
-        'tv': '5000',
-        'tv foreign': '5020',
-        'tv sd': '5030',
-        'tv hd': '5040',
-        'tv uhd': '5045',
-        'tv 4k': '5045',
-        'tv other': '5050',
-        'tv sport': '5060',
-        'tv anime': '5070',
-        'anime': '5070',
-        'tv documentary': '5080',
-        'audio': '3000',
-        'audio mp3': '3010',
-        'audio video': '3020',
-        'audio audiobook': '3030',
-        'audio lossless': '3040',
-        'console': '1000',
-        'pc': '4000',
-        'xxx': '6000',
-        'books': '7000',
-        'other': '8000',
-    }
-
-    cat_lower = category.lower().strip()
-    return category_mapping.get(cat_lower, '2000')
+    if not category:
+        return '2000'
+    if '0' <= category[0] <= '9':
+        return category if category in _KNOWN_CATEGORY_IDS else '2000'
+    return _CATEGORY_MAP.get(category.lower().strip(), '2000')
 
 
-def results_to_torznab_xml(results: List[Dict[str, Any]]) -> str:
-    rss = Element('rss', version='2.0')
-    rss.set('xmlns:torznab', 'http://torznab.com/schemas/2015/feed')
-    rss.set('xmlns:atom', 'http://www.w3.org/2005/Atom')
+def _xml_text(value: Any) -> str:
+    return '' if value is None else escape(str(value))
 
-    channel = SubElement(rss, 'channel')
 
-    SubElement(channel, 'title').text = 'Seedable - Cross-Seed Filter'
-    SubElement(channel, 'description').text = 'Filtered torrents available on 2+ trackers'
-    SubElement(channel, 'link').text = request.url_root
-
-    logger.info(f"Building XML for {len(results)} results")
-
-    for idx, result in enumerate(results):
-        item = SubElement(channel, 'item')
-
-        title = result.get('title', 'Unknown')
-
-        if '_tracker_counts' in result and PRIVATE_TRACKERS:
-            counts = result['_tracker_counts']
-            private_count = counts['private']
-            public_count = counts['public']
-            title = f"[PRI:{private_count} PUB:{public_count}] {title}"
-
-        SubElement(item, 'title').text = title
-        SubElement(item, 'guid').text = result.get('searchResultId', str(idx))
-
-        link = result.get('link', '')
-        if not link:
-            logger.warning(f"Result '{title}' has no download link!")
+def _xml_attr(value: Any) -> str:
+    return '' if value is None else escape(str(value), _XML_ATTR_ENTITIES)
 
-        SubElement(item, 'link').text = link
 
-        size = result.get('size', 0)
-        SubElement(item, 'enclosure',
-                   url=link,
-                   length=str(size),
-                   type='application/x-bittorrent')
+def _render_item(result: Dict[str, Any], tracker_counts: Optional[Tuple[int, int]], idx: int, now_str: str) -> str:
+    title = result.get('title', 'Unknown')
 
-        SubElement(item, 'comments').text = result.get('details_link', '')
+    if tracker_counts is not None:
+        private_count, public_count = tracker_counts
+        title = f"[PRI:{private_count} PUB:{public_count}] {title}"
 
-        raw_date = result.get('pubDate', result.get('date', ''))
-        SubElement(item, 'pubDate').text = format_rfc822_date(raw_date)
+    link = result.get('link', '')
 
-        SubElement(item, 'size').text = str(size)
-        SubElement(item, 'description').text = f"Tracker: {result.get('indexer', 'Unknown')}"
+    size = result.get('size', 0)
+    size_s = _xml_attr(size)
+    indexer_s = _xml_attr(result.get('indexer', 'Unknown'))
+    seeders = result.get('seeders', 0)
+    peers = result.get('peers', 0)
+    grabs = result.get('grabs', 0)
+    raw_date = result.get('pubDate', result.get('date', ''))
+    category_id = map_category_to_torznab(result.get('category', 'Movies'))
+    volume_factor = result.get('downloadVolumeFactor', result.get('torrentDownloadFactor'))
+    download_factor = '0' if volume_factor == 'Freelech' else '1'
 
-        category = result.get('category', 'Movies')
-        category_id = map_category_to_torznab(category)
+    parts = [
+        '<item>',
+        f'<title>{_xml_text(title)}</title>',
+        f'<guid>{_xml_text(result.get("searchResultId", str(idx)))}</guid>',
+        f'<link>{_xml_text(link)}</link>',
+        f'<enclosure url="{_xml_attr(link)}" length="{size_s}" type="application/x-bittorrent" />',
+        f'<comments>{_xml_text(result.get("details_link", ""))}</comments>',
+        f'<pubDate>{_xml_text(format_rfc822_date(raw_date, now_str))}</pubDate>',
+        f'<size>{size_s}</size>',
+        f'<description>Tracker: {indexer_s}</description>',
+        f'<category>{category_id}</category>',
+        f'<torznab:attr name="size" value="{size_s}" />',
+        f'<torznab:attr name="category" value="{category_id}" />',
+        f'<torznab:attr name="seeders" value="{_xml_attr(seeders)}" />',
+        f'<torznab:attr name="peers" value="{_xml_attr(peers)}" />',
+        f'<torznab:attr name="grabs" value="{_xml_attr(grabs)}" />',
+        f'<torznab:attr name="downloadvolumefactor" value="{download_factor}" />',
+        '<torznab:attr name="uploadvolumefactor" value="1" />',
+        f'<torznab:attr name="indexer" value="{indexer_s}" />',
+        '</item>',
+    ]
 
-        SubElement(item, 'category').text = category_id
+    if idx == 0:
+        logger.info("First result: title='%s', category=%s, size=%s, link=%s", title[:50], category_id, size, 'present' if link else 'MISSING')
 
-        SubElement(item, 'torznab:attr', name='size', value=str(size))
-        SubElement(item, 'torznab:attr', name='category', value=category_id)
+    return ''.join(parts)
 
-        seeders = result.get('seeders', 0)
-        peers = result.get('peers', 0)
-        SubElement(item, 'torznab:attr', name='seeders', value=str(seeders))
-        SubElement(item, 'torznab:attr', name='peers', value=str(peers))
 
-        SubElement(item, 'torznab:attr', name='grabs', value=str(result.get('grabs', 0)))
-        SubElement(item, 'torznab:attr', name='downloadvolumefactor',
-                   value='0' if result.get('downloadVolumeFactor', result.get('torrentDownloadFactor')) == 'Freelech' else '1')
-        SubElement(item, 'torznab:attr', name='uploadvolumefactor', value='1')
+def stream_torznab_xml(results: List[Tuple[Dict[str, Any], Optional[Tuple[int, int]]]], channel_link: str) -> Iterator[str]:
+    yield f'{_CHANNEL_OPEN}<link>{_xml_text(channel_link)}</link>'
 
-        SubElement(item, 'torznab:attr', name='indexer', value=result.get('indexer', 'Unknown'))
+    logger.info("Building XML for %d results", len(results))
 
-        if idx == 0:
-            logger.info(f"First result: title='{title[:50]}', category={category_id}, size={size}, link={'present' if link else 'MISSING'}")
+    now_str = rfc822_now()
 
-    xml_string = tostring(rss, encoding='unicode', method='xml')
-    final_xml = f'<?xml version="1.0" encoding="UTF-8"?>\n{xml_string}'
+    for idx, (result, tracker_counts) in enumerate(results):
+        yield _render_item(result, tracker_counts, idx, now_str)
 
-    logger.info(f"Generated XML with {len(results)} items, {len(final_xml)} bytes")
+    yield _CHANNEL_CLOSE
 
-    return final_xml
+    logger.info("Streamed XML with %d items", len(results))
 
 
 @app.route('/api')
 def torznab_api():
-    params = request.args.to_dict()
+    params = request.args
 
-    logger.info(f"=== INCOMING REQUEST ===")
-    logger.info(f"Request type: {params.get('t', 'unknown')}")
-    logger.info(f"Full params: {params}")
-    logger.info(f"User-Agent: {request.headers.get('User-Agent', 'unknown')}")
+    logger.info("=== INCOMING REQUEST ===")
+    logger.info("Request type: %s", params.get('t', 'unknown'))
+    logger.info("Full params: %s", params)
+    logger.info("User-Agent: %s", request.headers.get('User-Agent', 'unknown'))
 
     if params.get('apikey') != API_KEY:
-        logger.warning(f"Invalid API key: {params.get('apikey')}")
+        logger.warning("Invalid API key: %s", params.get('apikey'))
         return Response('Invalid API key', status=403)
 
     if params.get('t') == 'caps':
@@ -404,29 +564,17 @@ def torznab_api():
         return get_capabilities()
 
     if params.get('t') in ['search', 'movie', 'tvsearch']:
-        logger.info(f"=== SEARCH REQUEST ===")
-
-        clean_expired_cache()
+        logger.info("=== SEARCH REQUEST ===")
 
         cache_key = get_cache_key(params)
 
-        if cache_key in results_cache:
-            cache_entry = results_cache[cache_key]
-            cache_age = time.time() - cache_entry['timestamp']
-            if cache_age < CACHE_TTL:
-                filtered_results = cache_entry['results']
-                logger.info(f"Using cached results (age: {cache_age:.1f}s, {len(filtered_results)} results)")
-            else:
-                del results_cache[cache_key]
-                filtered_results = None
-        else:
-            filtered_results = None
+        filtered_results = get_cached_results(cache_key)
 
         if filtered_results is None:
             hydra_response = query_nzbhydra(params)
 
             all_results = hydra_response.get('searchResults', [])
-            logger.info(f"NZBHydra2 returned {len(all_results)} total results")
+            logger.info("NZBHydra2 returned %d total results", len(all_results))
 
             requested_imdbid = params.get('imdbid')
             requested_tvdbid = params.get('tvdbid')
@@ -435,45 +583,27 @@ def torznab_api():
                 if not requested_imdbid.startswith('tt'):
                     requested_imdbid = f'tt{requested_imdbid}'
                 all_results = [r for r in all_results if r.get('imdbId') == requested_imdbid]
-                logger.info(f"Filtered to {len(all_results)} results matching IMDb ID {requested_imdbid}")
+                logger.info("Filtered to %d results matching IMDb ID %s", len(all_results), requested_imdbid)
 
             if requested_tvdbid and not requested_imdbid:
                 all_results = [r for r in all_results if str(r.get('tvdbId')) == requested_tvdbid]
-                logger.info(f"Filtered to {len(all_results)} results matching TVDb ID {requested_tvdbid}")
-
-            groups = group_results(all_results)
-            logger.info(f"Grouped into {len(groups)} unique releases")
+                logger.info("Filtered to %d results matching TVDb ID %s", len(all_results), requested_tvdbid)
 
-            filtered_results = filter_cross_seedable(groups)
-            logger.info(f"Filtered to {len(filtered_results)} cross-seedable results (min {MIN_DUPLICATES} trackers)")
-
-            requested_cats = params.get('cat', '').split(',') if params.get('cat') else []
+            requested_cats = set(params.get('cat', '').split(',')) if params.get('cat') else set()
             if requested_cats:
                 category_filtered = []
-                for result in filtered_results:
+                for result in all_results:
                     result_cat = map_category_to_torznab(result.get('category', 'Movies'))
                     if result_cat in requested_cats or result_cat[:1] + '000' in requested_cats:
                         category_filtered.append(result)
-                logger.info(f"Category filtered to {len(category_filtered)} results matching {requested_cats}")
-                filtered_results = category_filtered
-
-            seen_urls = set()
-            unique_results = []
-            for result in filtered_results:
-                url = result.get('link', '')
-                if url and url not in seen_urls:
-                    seen_urls.add(url)
-                    unique_results.append(result)
-
-            if len(unique_results) < len(filtered_results):
-                logger.info(f"Deduplicated {len(filtered_results)} → {len(unique_results)} results (removed {len(filtered_results) - len(unique_results)} duplicate URLs)")
-                filtered_results = unique_results
-
-            results_cache[cache_key] = {
-                'results': filtered_results,
-                'timestamp': time.time()
-            }
-            logger.info(f"Cached {len(filtered_results)} results (key: {cache_key[:8]}...)")
+                logger.info("Category filtered to %d results matching %s", len(category_filtered), sorted(requested_cats))
+                all_results = category_filtered
+
+            filtered_results = group_and_filter(all_results)
+            logger.info("Filtered to %d cross-seedable results (min %d trackers)", len(filtered_results), MIN_DUPLICATES)
+
+            set_cached_results(cache_key, filtered_results)
+            logger.info("Cached %d results (key: %s...)", len(filtered_results), str(cache_key)[:40])
 
         offset = int(params.get('offset', 0))
         limit = int(params.get('limit', 100))
@@ -481,16 +611,14 @@ def torznab_api():
         total_results = len(filtered_results)
         paginated_results = filtered_results[offset:offset + limit]
 
-        logger.info(f"Pagination: offset={offset}, limit={limit}, total={total_results}, returning={len(paginated_results)}")
+        logger.info("Pagination: offset=%d, limit=%d, total=%d, returning=%d", offset, limit, total_results, len(paginated_results))
 
-        xml_response = results_to_torznab_xml(paginated_results)
-
-        return Response(xml_response, mimetype='application/xml')
+        return Response(stream_torznab_xml(paginated_results, request.url_root), mimetype='application/xml')
 
     return Response('Unknown request type', status=400)
 
 
-def get_capabilities():
+def _build_caps_xml() -> bytes:
     caps = Element('caps')
 
     server = SubElement(caps, 'server', version='1.0', title='Seedable')
@@ -538,8 +666,14 @@ def get_capabilities():
     SubElement(categories, 'category', id='8000', name='Other')
 
     xml_string = tostring(caps, encoding='unicode', method='xml')
-    return Response(f'<?xml version="1.0" encoding="UTF-8"?>\n{xml_string}',
-                    mimetype='application/xml')
+    return f'<?xml version="1.0" encoding="UTF-8"?>\n{xml_string}'.encode('utf-8')
+
+
+_CAPS_XML = _build_caps_xml()
+
+
+def get_capabilities():
+    return Response(_CAPS_XML, mimetype='application/xml')
 
 
 @app.route('/health')
@@ -574,4 +708,6 @@ if __name__ == '__main__':
     logger.info(f"NZBHydra2 URL: {NZBHYDRA_URL}")
     logger.info(f"Minimum duplicates: {MIN_DUPLICATES}")
     logger.info(f"Size tolerance: {SIZE_TOLERANCE_PERCENT}%")
+    logger.warning("Running the Flask development server (local testing only); "
+                   "use gunicorn, e.g. 'gunicorn -k gthread --threads 8 seedable:app', for real concurrency")
     app.run(host=HOST, port=PORT, debug=False)